@@ -7,11 +7,36 @@
     Learn more under: https://pyscaffold.org/
 """
 
+import os
+
 from setuptools import setup
 
+
+def get_ext_modules():
+    """
+    Compile the AST helpers with mypyc when PYTHON_REFACTOR_TOOL_BOX_MYPYC is set.
+    The pure Python modules are used otherwise.
+    """
+    if not os.environ.get("PYTHON_REFACTOR_TOOL_BOX_MYPYC"):
+        return []
+
+    from mypyc.build import mypycify
+
+    return mypycify(
+        [
+            "--follow-imports=silent",
+            "--ignore-missing-imports",
+            "src/python_refactor_tool_box/ast_helper.py",
+        ]
+    )
+
+
 if __name__ == "__main__":
     try:
-        setup(use_scm_version={"version_scheme": "no-guess-dev"})
+        setup(
+            use_scm_version={"version_scheme": "no-guess-dev"},
+            ext_modules=get_ext_modules(),
+        )
     except:  # noqa
         print(
             "\n\nAn error occurred while building the project, "
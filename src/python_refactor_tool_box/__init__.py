@@ -1,15 +1,9 @@
-import sys
+from importlib.metadata import PackageNotFoundError, version
 
 from .snake_case import to_snake_case  # noqa
 from .source_directory import SourceDirectory  # noqa
 from .source_file import SourceFile  # noqa
 
-if sys.version_info[:2] >= (3, 8):
-    # TODO: Import directly (no need for conditional) when `python_requires = >= 3.8`
-    from importlib.metadata import PackageNotFoundError, version  # pragma: no cover
-else:
-    from importlib_metadata import PackageNotFoundError, version  # pragma: no cover
-
 try:
     # Change here if project is renamed and does not equal the package name
     dist_name = "python_refactor_tool_box"
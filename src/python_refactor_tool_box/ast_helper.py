@@ -1,10 +1,186 @@
 import ast
-from typing import Dict, List, Set, Type, TypeVar
-
-import astor
+import io
+import logging
+import os
+import re
+import tokenize
+import weakref
+from collections import OrderedDict, deque
+from typing import (
+    AbstractSet,
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+    cast,
+)
 
 from .code_format_helper import format_code
 
+logger = logging.getLogger(__name__)
+
+_names_cache: "weakref.WeakKeyDictionary[ast.AST, FrozenSet[str]]" = (
+    weakref.WeakKeyDictionary()
+)
+_statement_ids_cache: "weakref.WeakKeyDictionary[ast.AST, FrozenSet[int]]" = (
+    weakref.WeakKeyDictionary()
+)
+_import_names_cache: "weakref.WeakKeyDictionary[ast.AST, FrozenSet[str]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+# Code trees of the last loaded files, keyed by absolute path
+_code_tree_cache: (
+    "OrderedDict[str, Tuple[Tuple[int, int], bytes, ast.Module, Dict]]"
+) = OrderedDict()
+_code_tree_cache_size = 128
+
+# Node types that never hold an ast.Name node
+_name_free_types = (
+    ast.expr_context,
+    ast.Constant,
+    ast.operator,
+    ast.boolop,
+    ast.cmpop,
+    ast.unaryop,
+    ast.alias,
+    ast.Import,
+    ast.ImportFrom,
+)
+
+# Node types that may hold statements (match_case only exists from Python 3.10)
+_statement_containers = tuple(
+    getattr(ast, name)
+    for name in ("stmt", "excepthandler", "match_case", "Module", "Interactive")
+    if hasattr(ast, name)
+)
+
+# Fields of statement containers holding statements, handlers or match cases
+_statement_fields = frozenset(("body", "handlers", "orelse", "finalbody", "cases"))
+_statement_fields_by_type: Dict[Type[ast.AST], Tuple[str, ...]] = {}
+
+
+def clear_node_caches() -> None:
+    """
+    Forget the names and ids cached per node.
+
+    Call this after modifying nodes in place whose names or nested statements
+    were already looked up.
+    """
+    _names_cache.clear()
+    _statement_ids_cache.clear()
+    _import_names_cache.clear()
+
+
+def _get_statement_fields(node_type: Type[ast.AST]) -> Tuple[str, ...]:
+    """
+    Get the fields of a node type holding statements, in ast.iter_child_nodes order.
+    """
+    fields = _statement_fields_by_type.get(node_type)
+    if fields is None:
+        if issubclass(node_type, _statement_containers):
+            fields = tuple(
+                field for field in node_type._fields if field in _statement_fields
+            )
+        else:
+            fields = ()
+        _statement_fields_by_type[node_type] = fields
+    return fields
+
+
+def _iter_names(node: ast.AST) -> Iterator[str]:
+    """
+    Iterate over the identifiers of the ast.Name nodes of a subtree.
+
+    Subtrees that cannot hold an ast.Name node are not visited.
+    """
+    todo = [node]
+    while todo:
+        node = todo.pop()
+        if type(node) is ast.Name:
+            yield cast(ast.Name, node).id
+            continue
+
+        # Same children as ast.iter_child_nodes, without its generator
+        for field in node._fields:
+            value = getattr(node, field, None)
+            if type(value) is list:
+                for item in value:
+                    if isinstance(item, ast.AST) and not isinstance(
+                        item, _name_free_types
+                    ):
+                        todo.append(item)
+            elif isinstance(value, ast.AST) and not isinstance(value, _name_free_types):
+                todo.append(value)
+
+
+def get_node_names(node: ast.AST) -> FrozenSet[str]:
+    """
+    Get the identifiers of all ast.Name nodes found in a node subtree.
+
+    The result is cached per node, so the subtree is walked only once.
+
+    Args:
+        node (ast.AST): The root node.
+
+    Returns:
+        FrozenSet[str]: The identifiers used in the subtree.
+    """
+    names = _names_cache.get(node)
+    if names is None:
+        names = frozenset(_iter_names(node))
+        _names_cache[node] = names
+    return names
+
+
+def iter_statements(tree: ast.AST) -> Iterator[ast.stmt]:
+    """
+    Iterate over all statements of a tree, in ast.walk order.
+
+    Expression subtrees never contain statements, so they are not visited.
+
+    Args:
+        tree (ast.AST): The root node.
+
+    Returns:
+        Iterator[ast.stmt]: The statements of the tree.
+    """
+    todo = deque([tree])
+    while todo:
+        node = todo.popleft()
+        if isinstance(node, ast.stmt):
+            yield node
+
+        for field in _get_statement_fields(type(node)):
+            todo.extend(getattr(node, field))
+
+
+def get_node_statement_ids(node: ast.AST) -> FrozenSet[int]:
+    """
+    Get the ids of all statements found in a node subtree, including the node itself.
+
+    Expression subtrees are not visited. The result is cached per node.
+
+    Args:
+        node (ast.AST): The root node.
+
+    Returns:
+        FrozenSet[int]: The ids of the subtree statements.
+    """
+    statement_ids = _statement_ids_cache.get(node)
+    if statement_ids is None:
+        statement_ids = frozenset(map(id, iter_statements(node)))
+        _statement_ids_cache[node] = statement_ids
+    return statement_ids
+
 
 def create_import_from(
     module_name: str, class_name: str, level: int = 1
@@ -24,45 +200,113 @@ def create_import_from(
     )
 
 
-def create_code(code_tree: Dict[Type[ast.AST], List[ast.AST]]) -> str:
+def get_import_names(imp: ast.AST) -> FrozenSet[str]:
+    """
+    Get the names whose use in code makes an import required.
+
+    For ast.Import nodes this is the top level package of each alias, for
+    ast.ImportFrom nodes with a module it is each imported name. The result is
+    cached per import node.
+
+    Args:
+        imp (ast.AST): The import node.
+
+    Returns:
+        FrozenSet[str]: The names provided by the import.
+    """
+    names = _import_names_cache.get(imp)
+    if names is None:
+        if type(imp) is ast.Import:
+            names = frozenset(alias.name.partition(".")[0] for alias in imp.names)
+        elif type(imp) is ast.ImportFrom and imp.module:
+            names = frozenset(alias.name for alias in imp.names)
+        else:
+            names = frozenset()
+        _import_names_cache[imp] = names
+    return names
+
+
+def _get_nested_statement_ids(nodes: List[ast.AST]) -> Set[int]:
+    """
+    Get the ids of the statements nested, at any depth, in some nodes.
+    """
+    nested_ids: Set[int] = set()
+    for node in nodes:
+        todo = [node]
+        while todo:
+            parent = todo.pop()
+            for field in _get_statement_fields(type(parent)):
+                for child in getattr(parent, field):
+                    if id(child) not in nested_ids:
+                        nested_ids.add(id(child))
+                        todo.append(child)
+    return nested_ids
+
+
+def create_code(
+    code_tree: Dict[Type[ast.AST], List[ast.AST]], formatted: bool = True
+) -> str:
     """
     Generate code from AST code_tree.
 
+    Formatting is the slowest step of code generation, callers formatting the
+    written files afterwards may skip it.
+
     Args:
         code_tree (Dict[Type[ast.AST], List[ast.AST]]): A dictionary of AST code_tree.
+        formatted (bool): Whether to format the code with format_code.
 
     Returns:
         str: The generated code.
     """
-    all_nodes = []
-    seen_nodes = set()
+    nodes = [node for ast_list in code_tree.values() for node in ast_list]
 
-    def add_to_seen_recursively(node):
-        """
-        Add the node and its body elements to seen_nodes recursively.
-        """
-        node_dump = ast.dump(node)
-        if node_dump not in seen_nodes:
-            seen_nodes.add(node_dump)
-            if hasattr(node, "body") and isinstance(node.body, list):
-                for n in node.body:
-                    add_to_seen_recursively(n)
-
-    for ast_list in code_tree.values():
-        for node in ast_list:
-            node_dump = ast.dump(node)
-            if node_dump not in seen_nodes:
-                seen_nodes.add(node_dump)
-                all_nodes.append(node)
-                if hasattr(node, "body") and isinstance(node.body, list):
-                    for n in node.body:
-                        add_to_seen_recursively(n)
+    # Nested statements are generated with their parent, wherever they appear
+    nested_node_ids = _get_nested_statement_ids(nodes)
+    all_nodes: List[ast.stmt] = []
+    seen_node_ids: Set[int] = set()
+    for node in nodes:
+        if id(node) not in nested_node_ids and id(node) not in seen_node_ids:
+            seen_node_ids.add(id(node))
+            all_nodes.append(cast(ast.stmt, node))
 
     module = ast.Module(body=all_nodes, type_ignores=[])
-    generated_code = astor.to_source(module)
+    generated_code = ast.unparse(module)
+    if not formatted:
+        return generated_code + "\n" if generated_code else generated_code
     return format_code(generated_code)
 
 
+def _find_required_imports(
+    names: AbstractSet[str], imports: List[ast.AST]
+) -> List[ast.AST]:
+    """
+    Find the imports providing some names, in imports order and without duplicates.
+    """
+    required_imports: List[ast.AST] = []
+    required_import_ids: Set[int] = set()
+    for imp in imports:
+        if id(imp) in required_import_ids:
+            continue
+        if not get_import_names(imp).isdisjoint(names):
+            required_import_ids.add(id(imp))
+            required_imports.append(imp)
+    return required_imports
+
+
+def _get_import_modules(imports: List[ast.AST]) -> List[str]:
+    """
+    Get the imported module names of import nodes, for reporting.
+    """
+    import_modules: List[str] = []
+    for imp in imports:
+        if type(imp) is ast.Import:
+            import_modules.extend(alias.name for alias in imp.names)
+        elif type(imp) is ast.ImportFrom and imp.module:
+            import_modules.append(imp.module)
+    return import_modules
+
+
 def get_class_required_imports(
     class_node: ast.ClassDef, imports: List[ast.AST]
 ) -> List[ast.AST]:
@@ -76,134 +320,228 @@ def get_class_required_imports(
     Returns:
         List[ast.AST]: A list of required import nodes.
     """
-    required_imports = []
-    class_names = {
-        node.id for node in ast.walk(class_node) if isinstance(node, ast.Name)
-    }
-
-    for imp in imports:
-        if isinstance(imp, ast.Import):
-            for alias in imp.names:
-                if alias.name.split(".")[0] in class_names:
-                    required_imports.append(imp)
-        elif isinstance(imp, ast.ImportFrom):
-            if imp.module and any(alias.name in class_names for alias in imp.names):
-                required_imports.append(imp)
-
-    import_modules = [
-        imp.module if isinstance(imp, ast.ImportFrom) else alias.name
-        for imp in required_imports
-        for alias in (imp.names if isinstance(imp, ast.Import) else [imp])
-    ]
-
-    print(f"class {class_node.name} requires imports: {', '.join(import_modules)}")
+    required_imports = _find_required_imports(get_node_names(class_node), imports)
+
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "class %s requires imports: %s",
+            class_node.name,
+            ", ".join(_get_import_modules(required_imports)),
+        )
     return required_imports
 
 
 def get_code_tree_required_imports(
-    code_tree: Dict[str, List[ast.AST]], imports: List[ast.AST]
+    code_tree: Dict[Type[ast.AST], List[ast.AST]], imports: List[ast.AST]
 ) -> List[ast.AST]:
     """
     Determine the required imports for given code code_tree.
 
     Args:
-        code_tree (Dict[str, List[ast.AST]]): A dictionary of code code_tree.
+        code_tree (Dict[Type[ast.AST], List[ast.AST]]): A dictionary of code code_tree.
         imports (List[ast.AST]): A list of import nodes.
 
     Returns:
         List[ast.AST]: A list of required import nodes.
     """
-
-    def extract_names(node: ast.AST) -> Set[str]:
-        return {n.id for n in ast.walk(node) if isinstance(n, ast.Name)}
-
-    all_names = {
-        name
-        for nodes in code_tree.values()
-        for node in nodes
-        for name in extract_names(node)
-    }
-    required_imports_set = set()
-
-    for imp in imports:
-        if isinstance(imp, ast.Import):
-            if any(alias.name.split(".")[0] in all_names for alias in imp.names):
-                required_imports_set.add(imp)
-        elif isinstance(imp, ast.ImportFrom):
-            if imp.module and any(alias.name in all_names for alias in imp.names):
-                required_imports_set.add(imp)
-
-    required_imports = list(required_imports_set)
-
-    import_modules = [
-        imp.module if isinstance(imp, ast.ImportFrom) else alias.name
-        for imp in required_imports
-        for alias in (imp.names if isinstance(imp, ast.Import) else [imp])
-    ]
-
-    print(f"Required imports: {', '.join(import_modules)}")
-
+    nodes = [node for ast_list in code_tree.values() for node in ast_list]
+
+    # Statements nested in another code_tree statement are already walked with it
+    nested_ids = _get_nested_statement_ids(nodes)
+    root_names = [get_node_names(node) for node in nodes if id(node) not in nested_ids]
+    all_names: AbstractSet[str]
+    if len(root_names) == 1:
+        all_names = root_names[0]
+    else:
+        all_names = set().union(*root_names)
+    required_imports = _find_required_imports(all_names, imports)
+
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "Required imports: %s", ", ".join(_get_import_modules(required_imports))
+        )
     return required_imports
 
 
 def remove_class_from_code_code_tree(
-    class_node: ast.ClassDef, code_tree: Dict[ast.stmt, List[ast.stmt]]
+    class_node: ast.ClassDef, code_tree: Dict[Type[ast.AST], List[ast.AST]]
 ) -> None:
     """
     Remove code_tree related to a specific class from code code_tree.
 
     Args:
         class_node (ast.ClassDef): The class node.
-        code_tree (Dict[str, List[ast.stmt]]): A dictionary of code code_tree.
+        code_tree (Dict[Type[ast.AST], List[ast.AST]]): A dictionary of code code_tree.
+    """
+    remove_classes_from_code_code_tree([class_node], code_tree)
+
+
+def remove_classes_from_code_code_tree(
+    class_nodes: List[ast.ClassDef], code_tree: Dict[Type[ast.AST], List[ast.AST]]
+) -> None:
     """
-    class_body_nodes = set(ast.walk(class_node))
+    Remove code_tree related to some classes from code code_tree.
+
+    Each code_tree list is scanned once, whatever the number of classes. Only
+    the statements of the classes are looked up, as code trees hold statements.
 
-    for key in code_tree:
-        initial_length = len(code_tree[key])
-        code_tree[key][:] = [
-            node for node in code_tree[key] if node not in class_body_nodes
-        ]
-        removed_count = initial_length - len(code_tree[key])
+    Args:
+        class_nodes (List[ast.ClassDef]): The class nodes.
+        code_tree (Dict[Type[ast.AST], List[ast.AST]]): A dictionary of code code_tree.
+    """
+    class_body_ids: AbstractSet[int]
+    if len(class_nodes) == 1:
+        class_body_ids = get_node_statement_ids(class_nodes[0])
+    else:
+        class_body_ids = set()
+        for class_node in class_nodes:
+            class_body_ids |= get_node_statement_ids(class_node)
+
+    for key, nodes in code_tree.items():
+        kept_count = 0
+        for node in nodes:
+            if id(node) not in class_body_ids:
+                nodes[kept_count] = node
+                kept_count += 1
+
+        removed_count = len(nodes) - kept_count
         if removed_count > 0:
-            print(f"Removed {removed_count} code_tree from {key}")
+            del nodes[kept_count:]
+            logger.debug("Removed %d code_tree from %s", removed_count, key)
+
 
+def _build_code_tree(tree: ast.AST) -> Dict[Type[ast.AST], List[ast.AST]]:
+    """
+    Group the statements of a tree by type, in ast.walk order.
+    """
+    code_tree: Dict[Type[ast.AST], List[ast.AST]] = {}
+
+    for node in iter_statements(tree):
+        code_tree.setdefault(type(node), []).append(node)
+
+    return code_tree
 
-def load_code_code_tree_from_code(code: str) -> Dict[ast.stmt, List[ast.stmt]]:
+
+def load_code_code_tree_from_code(
+    code: Union[str, bytes]
+) -> Dict[Type[ast.AST], List[ast.AST]]:
     """
     Load code code_tree from a given code string.
 
     Args:
-        code (str): The code to parse.
+        code (Union[str, bytes]): The code to parse.
 
     Returns:
-        Dict[str, List[ast.stmt]]: A dictionary of code code_tree.
+        Dict[Type[ast.AST], List[ast.AST]]: A dictionary of code code_tree.
     """
-    tree = ast.parse(code)
-    code_tree: Dict[ast.stmt, List[ast.stmt]] = {}
+    return _build_code_tree(ast.parse(code))
 
-    for node in ast.walk(tree):
-        if not isinstance(node, ast.stmt):
-            continue
 
-        code_tree.setdefault(type(node), []).append(node)
+def _load_file(
+    file_path: str,
+) -> Tuple[ast.Module, Dict[Type[ast.AST], List[ast.AST]]]:
+    """
+    Get the cached tree and code tree of a file, parsing it if needed.
+    """
+    cache_key = os.path.abspath(file_path)
+    stat = os.stat(cache_key)
+    signature = (stat.st_mtime_ns, stat.st_size)
+
+    cached = _code_tree_cache.get(cache_key)
+    if cached is None or cached[0] != signature:
+        with open(file_path, "rb") as file:
+            code = file.read()
+        # A touched file with the same content keeps its code tree
+        if cached is None or cached[1] != code:
+            tree = ast.parse(code, filename=file_path)
+            cached = (signature, code, tree, _build_code_tree(tree))
+        else:
+            cached = (signature, code, cached[2], cached[3])
+        _code_tree_cache[cache_key] = cached
+        _code_tree_cache.move_to_end(cache_key)
+        # With a size of 0 the new entry is evicted at once
+        while len(_code_tree_cache) > _code_tree_cache_size:
+            _code_tree_cache.popitem(last=False)
+    else:
+        _code_tree_cache.move_to_end(cache_key)
+
+    return cached[2], cached[3]
+
+
+def parse_file(file_path: str) -> ast.Module:
+    """
+    Parse a file.
 
-    code_tree = {key: value for key, value in code_tree.items() if code_tree[key]}
-    return code_tree
+    The tree is shared with load_code_code_tree_from_file and cached the same
+    way, so it must not be modified.
 
+    Args:
+        file_path (str): The path to the file.
 
-def load_code_code_tree_from_file(file_path: str) -> Dict[str, List[ast.stmt]]:
+    Returns:
+        ast.Module: The parsed tree.
+    """
+    return _load_file(file_path)[0]
+
+
+def load_code_code_tree_from_file(file_path: str) -> Dict[Type[ast.AST], List[ast.AST]]:
     """
     Load code code_tree from a file.
 
+    The code tree is cached until the file content changes. The file is only
+    read again when its modification time or size changes.
+    Each call returns new lists, so callers may add or remove nodes. The nodes
+    are shared with the cached tree, so they must not be modified.
+
     Args:
         file_path (str): The path to the file.
 
     Returns:
-        Dict[str, List[ast.stmt]]: A dictionary of code code_tree.
+        Dict[Type[ast.AST], List[ast.AST]]: A dictionary of code code_tree.
     """
-    with open(file_path) as file:
-        code = file.read()
-    return load_code_code_tree_from_code(code)
+    code_tree = _load_file(file_path)[1]
+    return {key: list(nodes) for key, nodes in code_tree.items()}
+
+
+def set_code_tree_cache_size(size: int) -> int:
+    """
+    Set the number of files whose trees are cached.
+
+    Repeated directory scans only reuse the trees of the files they parse when
+    the cache can hold all of them. A cached tree takes about 30 times the size
+    of its source in memory. A size of 0 disables the cache.
+
+    Args:
+        size (int): The maximum number of cached files.
+
+    Returns:
+        int: The previous maximum number of cached files.
+
+    Raises:
+        ValueError: If size is negative.
+    """
+    if size < 0:
+        raise ValueError(f"Invalid code tree cache size: {size}")
+
+    global _code_tree_cache_size
+    previous_size = _code_tree_cache_size
+    _code_tree_cache_size = size
+    while len(_code_tree_cache) > size:
+        _code_tree_cache.popitem(last=False)
+    return previous_size
+
+
+def clear_code_tree_cache(file_path: Optional[str] = None) -> None:
+    """
+    Forget the cached trees loaded by parse_file and load_code_code_tree_from_file.
+
+    Args:
+        file_path (Optional[str]): The file to forget, or None to forget all files.
+    """
+    if file_path is None:
+        _code_tree_cache.clear()
+    else:
+        _code_tree_cache.pop(os.path.abspath(file_path), None)
 
 
 T = TypeVar("T", bound=ast.AST)
@@ -222,12 +560,7 @@ def get_elements_by_type(
     Returns:
         List[T]: A list of elements of the specified type.
     """
-    try:
-        return code_tree[element_type]
-    except KeyError:
-        code_tree[element_type] = []
-
-    return get_elements_by_type(element_type, code_tree)
+    return cast(List[T], code_tree.setdefault(element_type, []))
 
 
 def set_elements_by_type(
@@ -278,8 +611,10 @@ def add_elements(
         new_elements (List[T]): The new elements to add.
     """
     elements = get_elements_by_type(element_type, code_tree)
+    element_ids = set(map(id, elements))
     for element in new_elements:
-        if element not in elements:
+        if id(element) not in element_ids:
+            element_ids.add(id(element))
             elements.append(element)
 
 
@@ -455,6 +790,36 @@ def add_returns(
     add_elements(ast.Return, code_tree, new_returns)
 
 
+def _get_definition_name(
+    node: Union[ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef]
+) -> str:
+    return node.name
+
+
+def _get_alias_names(node: Union[ast.Import, ast.ImportFrom]) -> str:
+    return ", ".join(alias.name for alias in node.names)
+
+
+def _get_names(node: Union[ast.Global, ast.Nonlocal]) -> str:
+    return ", ".join(node.names)
+
+
+def _get_target_name(node: ast.AnnAssign) -> str:
+    return cast(ast.Name, node.target).id
+
+
+_name_getters: Dict[Type[ast.AST], Callable[[Any], str]] = {
+    ast.FunctionDef: _get_definition_name,
+    ast.AsyncFunctionDef: _get_definition_name,
+    ast.ClassDef: _get_definition_name,
+    ast.ImportFrom: _get_alias_names,
+    ast.Import: _get_alias_names,
+    ast.Global: _get_names,
+    ast.Nonlocal: _get_names,
+    ast.AnnAssign: _get_target_name,
+}
+
+
 def get_name(node: ast.stmt) -> str:
     """
     Get the name of a node.
@@ -465,15 +830,167 @@ def get_name(node: ast.stmt) -> str:
     Returns:
         str: The name of the node.
     """
-    if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
-        return node.name
-    elif isinstance(node, (ast.ImportFrom, ast.Import)):
-        return ", ".join(alias.name for alias in node.names)
-    elif isinstance(node, (ast.Global, ast.Nonlocal)):
-        return ", ".join(node.names)
-    elif isinstance(node, ast.AnnAssign):
-        return node.target.id
-    return ""
+    name_getter = _name_getters.get(type(node))
+    return name_getter(node) if name_getter else ""
+
+
+class _ImportUpdater:
+    """
+    Update the import statements of a tree in place.
+
+    Only statements are visited, as imports never appear in expressions. The
+    updated import nodes are collected in updated_nodes.
+    """
+
+    def __init__(self, previous_module_name: str, new_module_name: str):
+        self.previous_module_name = previous_module_name
+        self.new_module_name = new_module_name
+        self.updated_nodes: List[ast.stmt] = []
+
+    def visit(self, tree: ast.AST) -> None:
+        for node in iter_statements(tree):
+            node_type = type(node)
+            if node_type is ast.Import:
+                self.visit_Import(cast(ast.Import, node))
+            elif node_type is ast.ImportFrom:
+                self.visit_ImportFrom(cast(ast.ImportFrom, node))
+
+    def visit_Import(self, node: ast.Import) -> None:
+        pass
+
+    def visit_ImportFrom(self, node: ast.ImportFrom) -> None:
+        pass
+
+
+class _ClassImportUpdater(_ImportUpdater):
+    """
+    Point imports of a class to the module the class was moved to.
+    """
+
+    def __init__(
+        self, class_name: str, previous_module_name: str, new_module_name: str
+    ):
+        super().__init__(previous_module_name, new_module_name)
+        self.class_name = class_name
+
+    def visit_Import(self, node: ast.Import) -> None:
+        previous_module_name = self.previous_module_name
+        updated = False
+        for alias in node.names:
+            if alias.name == previous_module_name:
+                alias.name = self.new_module_name
+                updated = True
+        if updated:
+            self.updated_nodes.append(node)
+
+    def visit_ImportFrom(self, node: ast.ImportFrom) -> None:
+        if node.module == self.previous_module_name:
+            class_name = self.class_name
+            if any(alias.name == class_name for alias in node.names):
+                node.module = self.new_module_name
+                self.updated_nodes.append(node)
+
+
+class _ModuleImportUpdater(_ImportUpdater):
+    """
+    Point imports of a module to its new name.
+    """
+
+    def __init__(self, previous_module_name: str, new_module_name: str):
+        super().__init__(previous_module_name, new_module_name)
+        self.previous_package_prefix = previous_module_name + "."
+
+    def _rename(self, name: str) -> Optional[str]:
+        """
+        Get the new name of a module, or None if it is not the module or a submodule.
+        """
+        previous_module_name = self.previous_module_name
+        if name == previous_module_name or name.startswith(
+            self.previous_package_prefix
+        ):
+            return self.new_module_name + name[len(previous_module_name) :]
+        return None
+
+    def visit_Import(self, node: ast.Import) -> None:
+        updated = False
+        for alias in node.names:
+            new_name = self._rename(alias.name)
+            if new_name is not None:
+                alias.name = new_name
+                updated = True
+        if updated:
+            self.updated_nodes.append(node)
+
+    def visit_ImportFrom(self, node: ast.ImportFrom) -> None:
+        if node.module:
+            new_module = self._rename(node.module)
+            if new_module is not None:
+                node.module = new_module
+                self.updated_nodes.append(node)
+
+
+def _replace_nodes_source(source: bytes, nodes: List[ast.stmt]) -> bytes:
+    """
+    Replace the code of some statements of a utf-8 source by their unparsed code.
+
+    The whole text of each replaced statement, comments inside it included, is
+    replaced. The rest of the source, comments and formatting included, is kept
+    as is.
+    """
+    # Node positions are given in lines and utf-8 byte offsets
+    line_offsets = [0]
+    for line in source.splitlines(keepends=True):
+        line_offsets.append(line_offsets[-1] + len(line))
+
+    chunks = []
+    position = 0
+    for node in sorted(nodes, key=lambda n: (n.lineno, n.col_offset)):
+        start = line_offsets[node.lineno - 1] + node.col_offset
+        end_lineno = cast(int, node.end_lineno)
+        end = line_offsets[end_lineno - 1] + cast(int, node.end_col_offset)
+        chunks.append(source[position:start])
+        chunks.append(ast.unparse(node).encode("utf-8"))
+        position = end
+    chunks.append(source[position:])
+
+    return b"".join(chunks)
+
+
+def _update_imports_in_file(target_file_path: str, updater: _ImportUpdater) -> None:
+    """
+    Run an import updater on a file and rewrite the imports it updated.
+
+    The file is read and written as bytes, in its own encoding, and left
+    untouched when no import was updated.
+    """
+    with open(target_file_path, "rb") as file:
+        source = file.read()
+
+    # Every updated import names the previous module as a whole word
+    previous_module_name = updater.previous_module_name.encode("utf-8")
+    if previous_module_name not in source or not re.search(
+        rb"(?<!\w)" + re.escape(previous_module_name) + rb"(?!\w)", source
+    ):
+        return
+
+    tree = ast.parse(source, filename=target_file_path)
+    updater.visit(tree)
+    if not updater.updated_nodes:
+        return
+
+    # Node positions are utf-8 byte offsets into the decoded source, which has
+    # no byte order mark, whatever the source encoding
+    encoding = tokenize.detect_encoding(io.BytesIO(source).readline)[0]
+    utf8_source = source.decode(encoding).encode("utf-8")
+    new_source = (
+        _replace_nodes_source(utf8_source, updater.updated_nodes)
+        .decode("utf-8")
+        .encode(encoding)
+    )
+
+    with open(target_file_path, "wb") as file:
+        file.write(new_source)
+    clear_code_tree_cache(target_file_path)
 
 
 def update_class_imports_in_file(
@@ -485,37 +1002,18 @@ def update_class_imports_in_file(
     """
     Update class imports in a target file.
 
+    Only the updated import statements are rewritten.
+
     Args:
         target_file_path (str): The path to the target file.
         class_name (str): The class name.
         previous_module_name (str): The previous module name.
         new_module_name (str): The new module name.
     """
-    with open(target_file_path) as file:
-        file_content = file.read()
-
-    tree = ast.parse(file_content, filename=target_file_path)
-
-    class ImportUpdater(ast.NodeTransformer):
-        def visit_Import(self, node: ast.Import) -> ast.AST:
-            for alias in node.names:
-                if alias.name == previous_module_name:
-                    alias.name = new_module_name
-            return node
-
-        def visit_ImportFrom(self, node: ast.ImportFrom) -> ast.AST:
-            if node.module == previous_module_name:
-                for alias in node.names:
-                    if alias.name == class_name:
-                        node.module = new_module_name
-            return node
-
-    updater = ImportUpdater()
-    new_tree = updater.visit(tree)
-    new_code = ast.unparse(new_tree)
-
-    with open(target_file_path, "w") as file:
-        file.write(new_code)
+    _update_imports_in_file(
+        target_file_path,
+        _ClassImportUpdater(class_name, previous_module_name, new_module_name),
+    )
 
 
 def update_module_imports_in_file(
@@ -524,35 +1022,13 @@ def update_module_imports_in_file(
     """
     Update module imports in a target file.
 
+    Only the updated import statements are rewritten.
+
     Args:
         target_file_path (str): The path to the target file.
         previous_module_name (str): The previous module name.
         new_module_name (str): The new module name.
     """
-    with open(target_file_path) as file:
-        file_content = file.read()
-
-    tree = ast.parse(file_content, filename=target_file_path)
-
-    class ImportUpdater(ast.NodeTransformer):
-        def visit_Import(self, node: ast.Import) -> ast.AST:
-            for alias in node.names:
-                if alias.name.startswith(previous_module_name):
-                    alias.name = alias.name.replace(
-                        previous_module_name, new_module_name, 1
-                    )
-            return node
-
-        def visit_ImportFrom(self, node: ast.ImportFrom) -> ast.AST:
-            if node.module and node.module.startswith(previous_module_name):
-                node.module = node.module.replace(
-                    previous_module_name, new_module_name, 1
-                )
-            return node
-
-    updater = ImportUpdater()
-    new_tree = updater.visit(tree)
-    new_code = ast.unparse(new_tree)
-
-    with open(target_file_path, "w") as file:
-        file.write(new_code)
+    _update_imports_in_file(
+        target_file_path, _ModuleImportUpdater(previous_module_name, new_module_name)
+    )
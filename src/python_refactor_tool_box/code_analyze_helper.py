@@ -1,8 +1,12 @@
 import ast
+import re
 from typing import Dict, List
 
 from .ast_helper import get_import_froms, get_imports
 
+# A line whose first non blank character starts neither a comment nor an import
+_code_line_pattern = re.compile(r"^[^\S\n]*(?!#|import|from)\S", re.MULTILINE)
+
 
 def should_delete_file(code: str) -> bool:
     """
@@ -14,17 +18,7 @@ def should_delete_file(code: str) -> bool:
     Returns:
         bool: True if the file should be deleted, False otherwise.
     """
-    code = code.strip()
-
-    if not code:
-        return True
-
-    lines = [line.strip() for line in code.split("\n")]
-    return all(
-        line.startswith("#") or line.startswith("import") or line.startswith("from")
-        for line in lines
-        if line
-    )
+    return _code_line_pattern.search(code) is None
 
 
 def should_delete_file_from_code_tree(
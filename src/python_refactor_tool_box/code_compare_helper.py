@@ -1,15 +1,26 @@
 import ast
+import os
+from collections import Counter
+from functools import partial
+from pathlib import Path
+from typing import Union
 
 from .ast_helper import load_code_code_tree_from_code
 
+# Field names make dumps longer without telling more nodes apart: optional
+# fields left out of a dump switch the remaining ones to keywords
+_dump = partial(ast.dump, annotate_fields=False)
 
-def compare_from_code(left_code: str, right_code: str) -> bool:
+
+def compare_from_code(
+    left_code: Union[str, bytes], right_code: Union[str, bytes]
+) -> bool:
     """
     Compare two pieces of code to determine if they are equivalent.
 
     Args:
-        left_code (str): The first piece of code.
-        right_code (str): The second piece of code.
+        left_code (Union[str, bytes]): The first piece of code.
+        right_code (Union[str, bytes]): The second piece of code.
 
     Returns:
         bool: True if the codes are equivalent, False otherwise.
@@ -20,13 +31,17 @@ def compare_from_code(left_code: str, right_code: str) -> bool:
     if len(left_code_tree) != len(right_code_tree):
         return False
 
+    # Check every statement count before dumping any statement
     for type_name in left_code_tree:
         if type_name not in right_code_tree:
             return False
         if len(left_code_tree[type_name]) != len(right_code_tree[type_name]):
             return False
-        if sorted(ast.dump(node) for node in left_code_tree[type_name]) != sorted(
-            ast.dump(node) for node in right_code_tree[type_name]
+
+    for type_name in left_code_tree:
+        # Statements may appear in any order, compare them as multisets
+        if Counter(map(_dump, left_code_tree[type_name])) != Counter(
+            map(_dump, right_code_tree[type_name])
         ):
             return False
 
@@ -44,8 +59,17 @@ def compare_codes_from_files(left_file_path: str, right_file_path: str) -> bool:
     Returns:
         bool: True if the files are equivalent, False otherwise.
     """
-    with open(left_file_path) as left_file, open(right_file_path) as right_file:
-        left_code = left_file.read()
-        right_code = right_file.read()
+    left_stat = os.stat(left_file_path)
+    right_stat = os.stat(right_file_path)
+    if os.path.samestat(left_stat, right_stat):
+        return True
+
+    # ast.parse accepts bytes and honours the source encoding, so the files
+    # are neither decoded nor read again
+    left_code = Path(left_file_path).read_bytes()
+    right_code = Path(right_file_path).read_bytes()
 
-    return left_code == right_code or compare_from_code(left_code, right_code)
+    # Files of different sizes can still hold equivalent code
+    if left_stat.st_size == right_stat.st_size and left_code == right_code:
+        return True
+    return compare_from_code(left_code, right_code)
@@ -1,3 +1,5 @@
+from functools import lru_cache
+
 import autopep8
 
 from .snake_case import to_snake_case
@@ -16,10 +18,13 @@ def format_code(code: str) -> str:
     return autopep8.fix_code(code)
 
 
+@lru_cache(maxsize=4096)
 def generate_module_name(class_name: str) -> str:
     """
     Generate a module name from a class name using snake case.
 
+    Results are memoized, as a refactoring converts the same names repeatedly.
+
     Args:
         class_name (str): The class name.
 
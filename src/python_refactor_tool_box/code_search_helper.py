@@ -1,93 +1,140 @@
 import ast
 import os
-from typing import List
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Callable, List, Optional
 
+from .ast_helper import iter_statements, parse_file
 
-def find_class_dependent_files(class_name: str, current_file_path: str) -> List[str]:
+
+def _parse_file(file_path: str, name: str) -> Optional[ast.Module]:
     """
-    Find files that depend on a specific class.
+    Parse a file importing a name, or return None if it cannot import it or
+    cannot be parsed.
 
-    Args:
-        class_name (str): The name of the class.
-        current_file_path (str): The path to the current file.
+    Trees are cached by ast_helper.parse_file until the file changes, for as
+    many files as set by ast_helper.set_code_tree_cache_size.
+    """
+    try:
+        # Reading is much cheaper than parsing, and most files do not match:
+        # they must mention the name and hold an import statement
+        with open(file_path, "rb") as f:
+            source = f.read()
+        if name.encode("utf-8") not in source or b"import" not in source:
+            return None
+        return parse_file(file_path)
+    except Exception as e:
+        print(f"Error parsing {file_path}: {e}")
+        return None
+
+
+def _depends_on_class(class_name: str, file_path: str) -> bool:
+    """
+    Check if a file imports a class.
 
-    Returns:
-        List[str]: A list of file paths that depend on the class.
+    Imports are statements, so expressions are not visited.
+    """
+    tree = _parse_file(file_path, class_name)
+    return tree is not None and any(
+        isinstance(node, (ast.ImportFrom, ast.Import))
+        and any(
+            alias.name == class_name or alias.name.split(".")[0] == class_name
+            for alias in node.names
+        )
+        for node in iter_statements(tree)
+    )
+
+
+def _depends_on_module(module_name: str, file_path: str) -> bool:
     """
-    directory_path = os.path.dirname(os.path.abspath(current_file_path))
+    Check if a file imports a module.
 
-    dependent_files = []
+    Imports are statements, so expressions are not visited.
+    """
+    tree = _parse_file(file_path, module_name)
+    return tree is not None and any(
+        (isinstance(node, ast.ImportFrom) and node.module == module_name)
+        or (
+            isinstance(node, ast.Import)
+            and any(alias.name.startswith(module_name + ".") for alias in node.names)
+        )
+        for node in iter_statements(tree)
+    )
+
+
+def _find_dependent_files(
+    depends_on: Callable[[str], bool],
+    current_file_path: str,
+    max_workers: Optional[int] = None,
+) -> List[str]:
+    """
+    Find the files next to a file, or below its directory, matching a predicate.
+
+    Files are scanned in the calling process by default, so later scans reuse
+    the trees kept by the parse_file cache. When max_workers is given, they are
+    scanned by a pool of worker processes instead: depends_on must then be
+    picklable, the trees parsed by the workers are not cached, and under the
+    spawn start method the calling script must guard its entry point.
+    """
+    current_file_path = os.path.abspath(current_file_path)
+    directory_path = os.path.dirname(current_file_path)
+
+    file_paths = []
 
+    # Walking a normalized absolute directory yields normalized absolute paths
     for root, _, files in os.walk(directory_path):
         for file in files:
             if file.endswith(".py"):
                 file_path = os.path.join(root, file)
-                if os.path.abspath(file_path) == os.path.abspath(current_file_path):
+                if file_path == current_file_path:
                     continue
+                file_paths.append(file_path)
 
-                with open(file_path) as f:
-                    try:
-                        file_content = f.read()
-                        tree = ast.parse(file_content, filename=file_path)
-                    except Exception as e:
-                        print(f"Error parsing {file_path}: {e}")
-                        continue
-
-                if any(
-                    isinstance(node, (ast.ImportFrom, ast.Import))
-                    and any(
-                        alias.name == class_name
-                        or alias.name.split(".")[0] == class_name
-                        for alias in node.names
-                    )
-                    for node in ast.walk(tree)
-                ):
-                    dependent_files.append(file_path)
-
-    return list(set(dependent_files))
-
-
-def find_module_dependent_files(module_name: str, current_file_path: str) -> List[str]:
+    if max_workers is None:
+        results = list(map(depends_on, file_paths))
+    else:
+        with ProcessPoolExecutor(max_workers) as executor:
+            results = list(executor.map(depends_on, file_paths, chunksize=16))
+
+    # os.walk yields each path once, so there are no duplicates to remove
+    return [file_path for file_path, result in zip(file_paths, results) if result]
+
+
+def find_class_dependent_files(
+    class_name: str, current_file_path: str, max_workers: Optional[int] = None
+) -> List[str]:
     """
-    Find files that depend on a specific module.
+    Find files that depend on a specific class.
 
     Args:
-        module_name (str): The name of the module.
+        class_name (str): The name of the class.
         current_file_path (str): The path to the current file.
+        max_workers (Optional[int]): The number of worker processes to scan the
+            files with, or None to scan them in the calling process.
 
     Returns:
-        List[str]: A list of file paths that depend on the module.
+        List[str]: A list of file paths that depend on the class.
     """
-    directory_path = os.path.dirname(os.path.abspath(current_file_path))
+    return _find_dependent_files(
+        partial(_depends_on_class, class_name), current_file_path, max_workers
+    )
 
-    dependent_files = []
 
-    for root, _, files in os.walk(directory_path):
-        for file in files:
-            if file.endswith(".py"):
-                file_path = os.path.join(root, file)
-                if os.path.abspath(file_path) == os.path.abspath(current_file_path):
-                    continue
+def find_module_dependent_files(
+    module_name: str, current_file_path: str, max_workers: Optional[int] = None
+) -> List[str]:
+    """
+    Find files that depend on a specific module.
 
-                with open(file_path) as f:
-                    try:
-                        file_content = f.read()
-                        tree = ast.parse(file_content, filename=file_path)
-                    except Exception as e:
-                        print(f"Error parsing {file_path}: {e}")
-                        continue
-
-                if any(
-                    (isinstance(node, ast.ImportFrom) and node.module == module_name)
-                    or (
-                        isinstance(node, ast.Import)
-                        and any(
-                            alias.name.startswith(module_name + ".")
-                            for alias in node.names
-                        )
-                    )
-                    for node in ast.walk(tree)
-                ):
-                    dependent_files.append(file_path)
-
-    return list(set(dependent_files))
+    Args:
+        module_name (str): The name of the module.
+        current_file_path (str): The path to the current file.
+        max_workers (Optional[int]): The number of worker processes to scan the
+            files with, or None to scan them in the calling process.
+
+    Returns:
+        List[str]: A list of file paths that depend on the module.
+    """
+    return _find_dependent_files(
+        partial(_depends_on_module, module_name), current_file_path, max_workers
+    )
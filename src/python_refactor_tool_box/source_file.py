@@ -3,24 +3,18 @@ import os
 from typing import Dict, List
 
 from .ast_helper import (
-    add_class,
-    add_classes,
-    add_import,
-    add_import_from,
-    add_import_froms,
-    add_imports,
+    add_element,
+    add_elements,
+    clear_code_tree_cache,
     create_code,
     create_import_from,
     get_class_required_imports,
-    get_classes,
     get_code_tree_required_imports,
-    get_import_froms,
-    get_imports,
+    get_elements_by_type,
     load_code_code_tree_from_file,
     remove_class_from_code_code_tree,
-    set_classes,
-    set_import_froms,
-    set_imports,
+    remove_classes_from_code_code_tree,
+    set_elements_by_type,
     update_class_imports_in_file,
     update_module_imports_in_file,
 )
@@ -89,6 +83,7 @@ class SourceFile:
 
         with open(self.path, "w") as file:
             file.write(code)
+        clear_code_tree_cache(self.path)
         return True
 
     @property
@@ -99,52 +94,51 @@ class SourceFile:
 
     @property
     def classes(self) -> List[ast.ClassDef]:
-        return get_classes(self.code_tree)
+        return get_elements_by_type(ast.ClassDef, self.code_tree)
 
     @classes.setter
     def classes(self, new_classes: List[ast.ClassDef]):
-        set_classes(self.code_tree, new_classes)
+        set_elements_by_type(ast.ClassDef, self.code_tree, new_classes)
 
     def add_class(self, class_node: ast.ClassDef) -> None:
-        add_class(self.classes, class_node)
+        add_element(ast.ClassDef, self.code_tree, class_node)
 
     def add_classes(self, classes: List[ast.ClassDef]) -> None:
-        add_classes(self.classes, classes)
+        add_elements(ast.ClassDef, self.code_tree, classes)
 
     def remove_class(self, class_node: ast.ClassDef) -> None:
         remove_class_from_code_code_tree(class_node, self.code_tree)
 
     def remove_classes(self, classes: List[ast.ClassDef]) -> None:
-        for class_node in classes:
-            self.remove_class(class_node)
+        remove_classes_from_code_code_tree(classes, self.code_tree)
 
     @property
     def imports(self) -> List[ast.AST]:
-        return get_imports(self.code_tree)
+        return get_elements_by_type(ast.Import, self.code_tree)
 
     @imports.setter
     def imports(self, new_imports: List[ast.AST]):
-        set_imports(self.code_tree, new_imports)
+        set_elements_by_type(ast.Import, self.code_tree, new_imports)
 
     def add_import(self, import_node: ast.Import) -> None:
-        add_import(self.imports, import_node)
+        add_element(ast.Import, self.code_tree, import_node)
 
     def add_imports(self, imports: List[ast.Import]) -> None:
-        add_imports(self.imports, imports)
+        add_elements(ast.Import, self.code_tree, imports)
 
     @property
     def import_froms(self) -> List[ast.AST]:
-        return get_import_froms(self.code_tree)
+        return get_elements_by_type(ast.ImportFrom, self.code_tree)
 
     @import_froms.setter
     def import_froms(self, new_import_from: List[ast.AST]):
-        set_import_froms(self.code_tree, new_import_from)
+        set_elements_by_type(ast.ImportFrom, self.code_tree, new_import_from)
 
     def add_import_from(self, import_from_node: ast.ImportFrom) -> None:
-        add_import_from(self.import_froms, import_from_node)
+        add_element(ast.ImportFrom, self.code_tree, import_from_node)
 
     def add_imports_from(self, import_froms: List[ast.ImportFrom]) -> None:
-        add_import_froms(self.import_froms, import_froms)
+        add_elements(ast.ImportFrom, self.code_tree, import_froms)
 
     @property
     def all_imports(self):
@@ -173,6 +167,7 @@ class SourceFile:
 
         # Remove existing file
         os.remove(self.path)
+        clear_code_tree_cache(self.path)
 
         dependant_files_paths = find_module_dependent_files(previous_module, self.path)
 
@@ -201,10 +196,15 @@ class SourceFile:
 
         directory = os.path.dirname(self.path)
 
+        # The code tree lists are updated in place, so they are looked up once
+        classes = self.classes
+        imports = self.imports
+        import_froms = self.import_froms
+
         i = 0
 
-        while i < len(self.classes):
-            class_node = self.classes[i]
+        while i < len(classes):
+            class_node = classes[i]
 
             class_name = class_node.name
             module_name = generate_module_name(class_name)
@@ -227,14 +227,14 @@ class SourceFile:
 
             # Create the class code
             source_file.all_imports = get_class_required_imports(
-                class_node, self.imports + self.import_froms
+                class_node, imports + import_froms
             )
             source_file.classes = [class_node]
             source_file.save()
 
             # Create the import to the class in the new module
             new_import = create_import_from(module_name, class_name)
-            self.imports.insert(0, new_import)
+            imports.insert(0, new_import)
 
             # Remove class form code code_tree
             self.remove_class(class_node)
@@ -247,7 +247,7 @@ class SourceFile:
                 )
 
         self.all_imports = get_code_tree_required_imports(
-            self.code_tree, self.imports + self.import_froms
+            self.code_tree, imports + import_froms
         )
 
         self.save()
@@ -3,8 +3,6 @@ import os
 import shutil
 import zipfile
 
-import astor
-
 from python_refactor_tool_box.code_format_helper import format_code
 
 global samples_directory
@@ -22,7 +20,7 @@ def refactor_code(code: str) -> str:
     """
     tree = ast.parse(code)
     tree.body.sort(key=lambda node: isinstance(node, ast.ImportFrom))
-    refactored_code = astor.to_source(tree)
+    refactored_code = ast.unparse(tree)
     return format_code(refactored_code)
 
 
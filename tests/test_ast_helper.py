@@ -0,0 +1,411 @@
+import ast
+import os
+import tempfile
+import unittest
+
+from python_refactor_tool_box.ast_helper import (
+    add_element,
+    add_elements,
+    clear_code_tree_cache,
+    clear_node_caches,
+    create_code,
+    get_class_required_imports,
+    get_code_tree_required_imports,
+    get_import_names,
+    get_name,
+    get_node_names,
+    get_node_statement_ids,
+    iter_statements,
+    load_code_code_tree_from_code,
+    load_code_code_tree_from_file,
+    parse_file,
+    remove_class_from_code_code_tree,
+    remove_classes_from_code_code_tree,
+    set_code_tree_cache_size,
+    update_class_imports_in_file,
+    update_module_imports_in_file,
+)
+
+
+class TestAstHelper(unittest.TestCase):
+    def test_get_node_names(self):
+        class_node = ast.parse("class A(Base):\n    x = os.path\n").body[0]
+        self.assertEqual(get_node_names(class_node), {"Base", "os", "x"})
+
+    def test_get_node_names_is_cached(self):
+        class_node = ast.parse("class A(Base):\n    pass\n").body[0]
+        self.assertIs(get_node_names(class_node), get_node_names(class_node))
+
+    def test_clear_node_caches(self):
+        class_node = ast.parse("class A:\n    x = os\n").body[0]
+        self.assertEqual(get_node_names(class_node), {"os", "x"})
+        class_node.body[0].value.id = "sys"
+        clear_node_caches()
+        self.assertEqual(get_node_names(class_node), {"sys", "x"})
+
+    def test_get_node_statement_ids(self):
+        class_node = ast.parse("class A:\n    x = 1\n").body[0]
+        statement_ids = get_node_statement_ids(class_node)
+        self.assertEqual(statement_ids, {id(class_node), id(class_node.body[0])})
+        self.assertIs(get_node_statement_ids(class_node), statement_ids)
+
+    def test_remove_class_from_code_code_tree(self):
+        code_tree = load_code_code_tree_from_code(
+            "class A:\n    def f(self):\n        pass\n\ndef g():\n    pass\n"
+        )
+        class_node = code_tree[ast.ClassDef][0]
+        remove_class_from_code_code_tree(class_node, code_tree)
+        self.assertEqual(code_tree[ast.ClassDef], [])
+        self.assertEqual([f.name for f in code_tree[ast.FunctionDef]], ["g"])
+
+    def test_add_elements_skips_duplicates(self):
+        code_tree = {}
+        first, second = ast.Pass(), ast.Pass()
+        add_elements(ast.Pass, code_tree, [first, second, first])
+        add_element(ast.Pass, code_tree, second)
+        self.assertEqual(len(code_tree[ast.Pass]), 2)
+        self.assertIs(code_tree[ast.Pass][0], first)
+        self.assertIs(code_tree[ast.Pass][1], second)
+
+    def test_iter_statements_matches_walk_order(self):
+        tree = ast.parse(
+            "import os\n"
+            "class A:\n"
+            "    x: int = 1\n"
+            "    def f(self):\n"
+            "        try:\n"
+            "            return [y for y in os.environ]\n"
+            "        except KeyError:\n"
+            "            pass\n"
+            "        finally:\n"
+            "            del self\n"
+            "if __name__ == '__main__':\n"
+            "    with open(__file__) as f:\n"
+            "        A()\n"
+            "else:\n"
+            "    A().f()\n"
+        )
+        expected = [node for node in ast.walk(tree) if isinstance(node, ast.stmt)]
+        self.assertEqual(list(iter_statements(tree)), expected)
+
+    def test_get_class_required_imports(self):
+        code_tree = load_code_code_tree_from_code(
+            "import os\n"
+            "import sys\n"
+            "from typing import List, Dict\n"
+            "class A:\n"
+            "    paths: List[str] = os.environ\n"
+        )
+        imports = code_tree[ast.Import] + code_tree[ast.ImportFrom]
+        required_imports = get_class_required_imports(
+            code_tree[ast.ClassDef][0], imports
+        )
+        self.assertEqual(required_imports, [imports[0], imports[2]])
+
+    def test_get_import_names(self):
+        code_tree = load_code_code_tree_from_code(
+            "import os.path, sys\nfrom typing import List\nfrom . import mod\n"
+        )
+        self.assertEqual(get_import_names(code_tree[ast.Import][0]), {"os", "sys"})
+        import_froms = code_tree[ast.ImportFrom]
+        self.assertEqual(get_import_names(import_froms[0]), {"List"})
+        self.assertEqual(get_import_names(import_froms[1]), frozenset())
+
+    def test_get_class_required_imports_lists_each_import_once(self):
+        code_tree = load_code_code_tree_from_code(
+            "import os, sys\nclass A:\n    x = os.sep + sys.prefix\n"
+        )
+        required_imports = get_class_required_imports(
+            code_tree[ast.ClassDef][0], code_tree[ast.Import]
+        )
+        self.assertEqual(required_imports, code_tree[ast.Import])
+
+    def test_update_class_imports_in_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "sample.py")
+            with open(file_path, "w") as file:
+                file.write(
+                    "# Imports\n"
+                    "import main\n"
+                    "from main import (A,\n"
+                    "                  B)  # A and B\n"
+                    "from other import A\n"
+                    "x = {'é': main}\n"
+                )
+
+            update_class_imports_in_file(file_path, "A", "main", "a")
+
+            with open(file_path) as file:
+                self.assertEqual(
+                    file.read(),
+                    "# Imports\n"
+                    "import a\n"
+                    "from a import A, B  # A and B\n"
+                    "from other import A\n"
+                    "x = {'é': main}\n",
+                )
+
+    def test_update_class_imports_in_file_drops_inner_comments(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "sample.py")
+            with open(file_path, "w") as file:
+                file.write("from main import (A,  # keep me\n    B)\n")
+
+            update_class_imports_in_file(file_path, "A", "main", "a")
+
+            with open(file_path) as file:
+                self.assertEqual(file.read(), "from a import A, B\n")
+
+    def test_update_module_imports_in_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "sample.py")
+            with open(file_path, "w") as file:
+                file.write(
+                    "import MyModule.sub\r\n"
+                    "if True:\r\n"
+                    "    import os; from MyModule import A\r\n"
+                )
+
+            update_module_imports_in_file(file_path, "MyModule", "my_module")
+
+            with open(file_path, newline="") as file:
+                self.assertEqual(
+                    file.read(),
+                    "import my_module.sub\r\n"
+                    "if True:\r\n"
+                    "    import os; from my_module import A\r\n",
+                )
+
+    def test_load_code_code_tree_from_file_reloads_changed_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "sample.py")
+            with open(file_path, "w") as file:
+                file.write("import os\n")
+
+            code_tree = load_code_code_tree_from_file(file_path)
+            code_tree[ast.Import].clear()
+            code_tree = load_code_code_tree_from_file(file_path)
+            self.assertEqual(len(code_tree[ast.Import]), 1)
+
+            with open(file_path, "w") as file:
+                file.write("import os\nimport sys\n\nclass A:\n    pass\n")
+            clear_code_tree_cache(file_path)
+
+            code_tree = load_code_code_tree_from_file(file_path)
+            self.assertEqual(len(code_tree[ast.Import]), 2)
+            self.assertEqual(len(code_tree[ast.ClassDef]), 1)
+
+    def test_get_name(self):
+        tree = ast.parse(
+            "import os, sys\n"
+            "from typing import List\n"
+            "class A:\n"
+            "    x: int = 1\n"
+            "async def f():\n"
+            "    global g, h\n"
+            "y = 2\n"
+        )
+        names = [get_name(node) for node in iter_statements(tree)]
+        self.assertEqual(names, ["os, sys", "List", "A", "f", "", "x", "g, h"])
+
+    def test_get_code_tree_required_imports_keeps_import_order(self):
+        code_tree = load_code_code_tree_from_code(
+            "import sys\nimport os\nimport re\nfrom typing import List\n"
+            "def f() -> List[str]:\n    return os.listdir(sys.prefix)\n"
+        )
+        imports = code_tree[ast.Import] + code_tree[ast.ImportFrom]
+        required_imports = get_code_tree_required_imports(code_tree, imports + imports)
+        self.assertEqual(required_imports, [imports[0], imports[1], imports[3]])
+
+    def test_remove_classes_from_code_code_tree(self):
+        code_tree = load_code_code_tree_from_code(
+            "class A:\n    x = 1\n\nclass B:\n    y = 2\n\nclass C:\n    z = 3\n"
+        )
+        class_a, class_b, class_c = code_tree[ast.ClassDef]
+        remove_classes_from_code_code_tree([class_a, class_c], code_tree)
+        self.assertEqual(code_tree[ast.ClassDef], [class_b])
+        self.assertEqual(code_tree[ast.Assign], class_b.body)
+
+    def test_create_code(self):
+        code = (
+            "import os\n"
+            "\n"
+            "\n"
+            "class A:\n"
+            "    x: int = 1\n"
+            "\n"
+            "    def f(self):\n"
+            "        return os.sep\n"
+            "\n"
+            "\n"
+            "def g():\n"
+            "    return A()\n"
+        )
+        self.assertEqual(create_code(load_code_code_tree_from_code(code)), code)
+
+    def test_create_code_keeps_identical_statements(self):
+        code = "print('tick')\nprint('tick')\n"
+        self.assertEqual(create_code(load_code_code_tree_from_code(code)), code)
+
+    def test_get_code_tree_required_imports_with_nested_statements(self):
+        code_tree = load_code_code_tree_from_code(
+            "import os\nimport sys\nclass A:\n    def f(self):\n        return os.sep\n"
+        )
+        imports = code_tree[ast.Import]
+        function_tree = {ast.FunctionDef: code_tree[ast.FunctionDef]}
+        return_tree = {ast.Return: code_tree[ast.Return]}
+        self.assertEqual(
+            get_code_tree_required_imports(code_tree, imports), imports[:1]
+        )
+        self.assertEqual(
+            get_code_tree_required_imports(function_tree, imports), imports[:1]
+        )
+        self.assertEqual(
+            get_code_tree_required_imports(return_tree, imports), imports[:1]
+        )
+
+    def test_update_imports_in_file_skips_unchanged_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "sample.py")
+            with open(file_path, "w") as file:
+                file.write("import other.main\nfrom main import B\nimport mod_a\n")
+            os.utime(file_path, ns=(0, 0))
+
+            update_class_imports_in_file(file_path, "A", "main", "a")
+            update_module_imports_in_file(file_path, "mod", "new_mod")
+
+            self.assertEqual(os.stat(file_path).st_mtime_ns, 0)
+
+    def test_load_code_code_tree_from_file_keeps_touched_file_tree(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "sample.py")
+            with open(file_path, "w") as file:
+                file.write("import os\n")
+
+            code_tree = load_code_code_tree_from_file(file_path)
+            os.utime(file_path, ns=(0, 0))
+            touched_code_tree = load_code_code_tree_from_file(file_path)
+            self.assertIs(touched_code_tree[ast.Import][0], code_tree[ast.Import][0])
+
+    def test_update_module_imports_in_file_with_byte_order_mark(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "sample.py")
+            with open(file_path, "wb") as file:
+                file.write(b"\xef\xbb\xbfimport MyModule  # \xc3\xa9\n")
+
+            update_module_imports_in_file(file_path, "MyModule", "my_module")
+
+            with open(file_path, "rb") as file:
+                self.assertEqual(
+                    file.read(), b"\xef\xbb\xbfimport my_module  # \xc3\xa9\n"
+                )
+
+    def test_update_module_imports_in_file_with_encoding_declaration(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "sample.py")
+            with open(file_path, "wb") as file:
+                file.write(
+                    b"# -*- coding: latin-1 -*-\nx = '\xe9\xe9'; import MyModule\n"
+                )
+
+            update_module_imports_in_file(file_path, "MyModule", "my_module")
+
+            with open(file_path, "rb") as file:
+                self.assertEqual(
+                    file.read(),
+                    b"# -*- coding: latin-1 -*-\nx = '\xe9\xe9'; import my_module\n",
+                )
+
+    def test_update_module_imports_in_file_keeps_other_modules(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "sample.py")
+            with open(file_path, "w") as file:
+                file.write(
+                    "import MyModuleHelpers, MyModule.sub\n"
+                    "from MyModuleHelpers import A\n"
+                )
+
+            update_module_imports_in_file(file_path, "MyModule", "my_module")
+
+            with open(file_path) as file:
+                self.assertEqual(
+                    file.read(),
+                    "import MyModuleHelpers, my_module.sub\n"
+                    "from MyModuleHelpers import A\n",
+                )
+
+    def test_create_code_with_nested_statement_fields(self):
+        code = (
+            "if x:\n"
+            "    a = 1\n"
+            "else:\n"
+            "    b = 2\n"
+            "try:\n"
+            "    pass\n"
+            "except KeyError:\n"
+            "    c = 3\n"
+            "finally:\n"
+            "    d = 4\n"
+        )
+        self.assertEqual(create_code(load_code_code_tree_from_code(code)), code)
+
+    def test_create_code_with_nested_statement_identical_to_top_level_one(self):
+        for code in (
+            "import os\n\n\ndef f():\n    import os\n    return os.sep\n",
+            "x = 1\nif x:\n    x = 1\n",
+        ):
+            self.assertEqual(create_code(load_code_code_tree_from_code(code)), code)
+
+    def test_parse_file_shares_load_cache(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "sample.py")
+            with open(file_path, "w") as file:
+                file.write("import os\n")
+
+            tree = parse_file(file_path)
+            self.assertIs(parse_file(file_path), tree)
+            code_tree = load_code_code_tree_from_file(file_path)
+            self.assertIs(code_tree[ast.Import][0], tree.body[0])
+
+    def test_set_code_tree_cache_size(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_paths = [os.path.join(directory, f"{name}.py") for name in "ab"]
+            for file_path in file_paths:
+                with open(file_path, "w") as file:
+                    file.write("import os\n")
+
+            previous_size = set_code_tree_cache_size(1)
+            self.addCleanup(set_code_tree_cache_size, previous_size)
+            tree = parse_file(file_paths[0])
+            parse_file(file_paths[1])
+            self.assertIsNot(parse_file(file_paths[0]), tree)
+
+            set_code_tree_cache_size(2)
+            tree = parse_file(file_paths[1])
+            parse_file(file_paths[0])
+            self.assertIs(parse_file(file_paths[1]), tree)
+
+    def test_set_code_tree_cache_size_to_zero(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "sample.py")
+            with open(file_path, "w") as file:
+                file.write("import os\n")
+
+            previous_size = set_code_tree_cache_size(0)
+            self.addCleanup(set_code_tree_cache_size, previous_size)
+            tree = parse_file(file_path)
+            self.assertIsNot(parse_file(file_path), tree)
+            code_tree = load_code_code_tree_from_file(file_path)
+            self.assertEqual(len(code_tree[ast.Import]), 1)
+
+    def test_set_code_tree_cache_size_rejects_negative_size(self):
+        with self.assertRaises(ValueError):
+            set_code_tree_cache_size(-1)
+
+    def test_create_code_without_formatting(self):
+        code = "import os\n\n\ndef f():\n    return os.sep\n"
+        self.assertEqual(
+            create_code(load_code_code_tree_from_code(code), formatted=False),
+            "import os\n\ndef f():\n    return os.sep\n",
+        )
+        self.assertEqual(create_code({}, formatted=False), "")
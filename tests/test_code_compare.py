@@ -1,4 +1,7 @@
+import os
+import tempfile
 import unittest
+from unittest import mock
 
 from helper import (
     create_sample_files,
@@ -6,6 +9,7 @@ from helper import (
     input_samples_directory,
 )
 
+from python_refactor_tool_box import code_compare_helper
 from python_refactor_tool_box.code_compare_helper import (
     compare_codes_from_files,
     compare_from_code,
@@ -36,3 +40,46 @@ class TestCodeCompareHelper(unittest.TestCase):
         file_path1 = input_samples_directory + "/main.py"
         file_path2 = expected_samples_directory + "/utils/helper.py"
         self.assertFalse(compare_codes_from_files(str(file_path1), str(file_path2)))
+
+    def test_compare_from_code_reordered_code(self):
+        code1 = "import os\nimport sys\nx = 1\nx = 1\ny = 2\n"
+        code2 = "import sys\nimport os\ny = 2\nx = 1\nx = 1\n"
+        code3 = "import sys\nimport os\ny = 2\ny = 2\nx = 1\n"
+        self.assertTrue(compare_from_code(code1, code2))
+        self.assertFalse(compare_from_code(code1, code3))
+
+    def test_compare_codes_from_files_equivalent_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_path1 = os.path.join(directory, "left.py")
+            file_path2 = os.path.join(directory, "right.py")
+            with open(file_path1, "w") as file:
+                file.write("x = 1\n")
+            with open(file_path2, "w") as file:
+                file.write("x   =   1\n")
+            self.assertTrue(compare_codes_from_files(file_path1, file_path2))
+            with open(file_path2, "w") as file:
+                file.write("x = 2\n")
+            self.assertFalse(compare_codes_from_files(file_path1, file_path2))
+
+    def test_compare_codes_from_files_with_encoding_declaration(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_path1 = os.path.join(directory, "left.py")
+            file_path2 = os.path.join(directory, "right.py")
+            with open(file_path1, "wb") as file:
+                file.write("# -*- coding: latin-1 -*-\nx = 'é'\n".encode("latin-1"))
+            with open(file_path2, "wb") as file:
+                file.write("x = 'é'\r\n".encode("utf-8"))
+            self.assertTrue(compare_codes_from_files(file_path1, file_path2))
+
+    def test_compare_from_code_optional_fields(self):
+        self.assertFalse(compare_from_code("from . import a\n", "from a import a\n"))
+        self.assertFalse(
+            compare_from_code("def f(a=1): pass\n", "def f(a, b=1): pass\n")
+        )
+
+    def test_compare_from_code_different_counts_skip_dumps(self):
+        code1 = "import os\nx = 1\n"
+        code2 = "import os\nx = 1\nx = 1\n"
+        with mock.patch.object(code_compare_helper, "_dump") as dump:
+            self.assertFalse(compare_from_code(code1, code2))
+        dump.assert_not_called()
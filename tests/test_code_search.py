@@ -0,0 +1,104 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from python_refactor_tool_box import code_search_helper
+from python_refactor_tool_box.code_search_helper import (
+    find_class_dependent_files,
+    find_module_dependent_files,
+)
+
+
+class TestCodeSearchHelper(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.files = {
+            "main.py": "class A:\n    pass\n",
+            "uses_class.py": "from main import A\n",
+            "uses_module.py": "from main import B\n",
+            "uses_submodule.py": "import main.sub\n",
+            "other.py": "import os\n",
+        }
+        for file_name, code in self.files.items():
+            with open(os.path.join(self.directory.name, file_name), "w") as file:
+                file.write(code)
+        self.current_file_path = os.path.join(self.directory.name, "main.py")
+
+    def __paths(self, *file_names):
+        return sorted(os.path.join(self.directory.name, name) for name in file_names)
+
+    def test_find_class_dependent_files(self):
+        self.assertEqual(
+            sorted(find_class_dependent_files("A", self.current_file_path)),
+            self.__paths("uses_class.py"),
+        )
+
+    def test_find_module_dependent_files(self):
+        self.assertEqual(
+            sorted(find_module_dependent_files("main", self.current_file_path)),
+            self.__paths("uses_class.py", "uses_module.py", "uses_submodule.py"),
+        )
+
+    def test_find_dependent_files_in_worker_processes(self):
+        self.assertEqual(
+            sorted(find_class_dependent_files("A", self.current_file_path, 2)),
+            self.__paths("uses_class.py"),
+        )
+        self.assertEqual(
+            sorted(find_module_dependent_files("main", self.current_file_path, 2)),
+            self.__paths("uses_class.py", "uses_module.py", "uses_submodule.py"),
+        )
+
+    def test_find_class_dependent_files_after_file_change(self):
+        find_class_dependent_files("A", self.current_file_path)
+        file_path = os.path.join(self.directory.name, "other.py")
+        with open(file_path, "w") as file:
+            file.write("from main import A\n\n\nclass B(A):\n    pass\n")
+
+        self.assertEqual(
+            sorted(find_class_dependent_files("A", self.current_file_path)),
+            self.__paths("other.py", "uses_class.py"),
+        )
+
+    def test_find_class_dependent_files_with_nested_import(self):
+        file_path = os.path.join(self.directory.name, "other.py")
+        with open(file_path, "w") as file:
+            file.write(
+                "def f():\n"
+                "    try:\n"
+                "        from main import A\n"
+                "    finally:\n"
+                "        pass\n"
+            )
+
+        self.assertEqual(
+            sorted(find_class_dependent_files("A", self.current_file_path)),
+            self.__paths("other.py", "uses_class.py"),
+        )
+
+    def test_find_class_dependent_files_skips_unrelated_files(self):
+        with mock.patch.object(
+            code_search_helper, "parse_file", wraps=code_search_helper.parse_file
+        ) as parse_file:
+            find_class_dependent_files("A", self.current_file_path)
+
+        self.assertEqual(
+            [call.args[0] for call in parse_file.call_args_list],
+            self.__paths("uses_class.py"),
+        )
+
+    def test_find_class_dependent_files_skips_files_without_imports(self):
+        with open(os.path.join(self.directory.name, "other.py"), "w") as file:
+            file.write("class A:\n    pass\n")
+
+        with mock.patch.object(
+            code_search_helper, "parse_file", wraps=code_search_helper.parse_file
+        ) as parse_file:
+            find_class_dependent_files("A", self.current_file_path)
+
+        self.assertEqual(
+            [call.args[0] for call in parse_file.call_args_list],
+            self.__paths("uses_class.py"),
+        )
@@ -1,3 +1,6 @@
+import ast
+import os
+import tempfile
 import unittest
 from typing import List
 
@@ -33,3 +36,13 @@ class TestSourceFile(unittest.TestCase):
 
         for i in range(len(input_source_files)):
             self.assertTrue(input_source_files[i] == expected_source_files[i])
+
+    def test_add_class(self):
+        with tempfile.TemporaryDirectory() as directory:
+            source_file = SourceFile(os.path.join(directory, "sample.py"))
+            class_node = ast.parse("class A:\n    pass\n").body[0]
+
+            source_file.add_class(class_node)
+            source_file.add_classes([class_node])
+
+            self.assertEqual(source_file.classes, [class_node])